@@ -0,0 +1,9 @@
+"""
+Shared pytest configuration.
+"""
+
+import sys
+from pathlib import Path
+
+# Make scripts/check_esi_update.py importable; runs once per session
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
@@ -3,35 +3,170 @@
 Script to check ESI compatibility dates and post to Discord if updated.
 """
 
-import argparse
+from __future__ import annotations
+
+import functools
+import gzip
+import hashlib
 import json
 import os
+import random
 import sys
-from datetime import datetime
-from typing import Optional, Union, List, Dict, Any
-from urllib import request
-from urllib.error import URLError, HTTPError
+import time
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Optional, Union, List, Dict, Any, Callable, Tuple, TypeVar
+
+# argparse and datetime are imported where used: the scheduled run needs
+# neither when no flags are given and all dates are plain YYYY-MM-DD.
+# urllib.request (which pulls in http.client, email and ssl), urllib.error
+# and concurrent.futures are likewise deferred to the functions doing I/O,
+# and the optional orjson (which imports datetime, uuid and zoneinfo) to the
+# first response body that is decoded.
+if TYPE_CHECKING:
+    import argparse
+    from datetime import datetime
+    from urllib.error import HTTPError
 
 # Constants
 ESI_COMPAT_URL = "https://esi.evetech.net/meta/compatibility-dates"
 LAST_DATE_FILE = "last_esi_date.txt"
-# Only used for Discord webhook POSTs
+LAST_HEADERS_FILE = "last_esi_headers.json"
+LAST_DIGEST_FILE = "last_esi_digest.txt"
+ESI_CACHE_FILE = "esi_cache.json"
+DEFAULT_CACHE_TTL = 300
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_MAX_INTERVAL = 3600
+# Static headers for Discord webhook POSTs; the User-Agent is added per call
+_DISCORD_HEADERS: Dict[str, str] = {"Content-Type": "application/json"}
+# HTTP status codes worth retrying; everything else fails immediately
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+# Webhook POSTs are not idempotent: only retry statuses where Discord did not
+# accept the message, so a 5xx after delivery cannot post it twice
+POST_RETRYABLE_STATUS_CODES = (429, 503)
+
+T = TypeVar("T")
+# read_last_known_date cache: path -> ((st_ino, st_mtime_ns, st_size), value)
+_state_cache: Dict[str, Tuple[Tuple[int, int, int], Optional[str]]] = {}
+# Returned by fetch_esi_compatibility_dates when ESI answers 304 Not Modified
+NOT_MODIFIED: Dict[str, Any] = {"not_modified": True}
+
+
+def _retry_after(error: HTTPError) -> Optional[float]:
+    """Return the Retry-After delay in seconds from an HTTP error, if present."""
+    if error.headers is None:
+        return None
+    value = error.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _retry(
+    fn: Callable[[], T],
+    max_attempts: int = 5,
+    base: float = 1.0,
+    cap: float = 30.0,
+    retry_statuses: Tuple[int, ...] = RETRYABLE_STATUS_CODES
+) -> T:
+    """Call fn, retrying transient network failures with exponential backoff.
+    
+    Uses capped exponential backoff with full jitter, honoring a Retry-After
+    header when the server sends one.
+    
+    Args:
+        fn: Zero-argument callable performing the request.
+        max_attempts: Total number of attempts before giving up.
+        base: Base delay in seconds for the first retry.
+        cap: Upper bound in seconds for any single delay.
+        retry_statuses: HTTP status codes that are retried.
+    
+    Returns:
+        The return value of fn.
+    
+    Raises:
+        HTTPError: On a non-retryable status, or after the last attempt.
+        URLError: After the last attempt.
+    """
+    from urllib.error import HTTPError, URLError
+
+    for attempt in range(max_attempts):
+        try:
+            return fn()
+        except HTTPError as e:
+            if e.code not in retry_statuses or attempt == max_attempts - 1:
+                raise
+            error: URLError = e
+            delay = _retry_after(e)
+        except URLError as e:
+            if attempt == max_attempts - 1:
+                raise
+            error = e
+            delay = None
 
+        if delay is None:
+            delay = random.uniform(0, min(cap, base * 2 ** attempt))
+        delay = min(cap, delay)
+        print(f"Transient error ({error}); retrying in {delay:.1f}s "
+              f"(attempt {attempt + 2}/{max_attempts})")
+        time.sleep(delay)
 
-def fetch_esi_compatibility_dates() -> Dict[str, Any]:
+    raise ValueError("max_attempts must be at least 1")
+
+
+@functools.lru_cache(maxsize=None)
+def _json_loads() -> Callable[[bytes], Any]:
+    """Return the JSON decoder for ESI responses, resolved on first use."""
+    # orjson is optional; its decode errors subclass json.JSONDecodeError
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def fetch_esi_compatibility_dates(
+    validators: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
     """Fetch the latest compatibility dates from ESI API.
     
+    Args:
+        validators: Optional cache validators ({"etag": ..., "last_modified": ...})
+                    from a previous response. When given, the request is made
+                    conditional and the dict is updated in place with the
+                    validators of a fresh 200 response.
+    
     Returns:
-        The full JSON object returned by the ESI API.
+        The full JSON object returned by the ESI API, or NOT_MODIFIED if the
+        server answered 304 Not Modified.
         Expected format: {"compatibility_dates": ["2025-11-06", ...]}
     
     Raises:
         SystemExit: On network errors or invalid JSON responses.
     """
+    from urllib import request
+    from urllib.error import HTTPError, URLError
+
+    headers: Dict[str, str] = {"Accept-Encoding": "gzip"}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    req = request.Request(ESI_COMPAT_URL, headers=headers)
+
     try:
         # No custom User-Agent needed here per your note
-        with request.urlopen(ESI_COMPAT_URL, timeout=10) as response:
-            data = json.loads(response.read().decode())
+        with _retry(lambda: request.urlopen(req, timeout=10)) as response:
+            body = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            data = _json_loads()(body)
             
             # Validate the response structure
             if not isinstance(data, dict):
@@ -39,13 +174,69 @@ def fetch_esi_compatibility_dates() -> Dict[str, Any]:
                 print(f"Expected a JSON object with 'compatibility_dates' key")
                 sys.exit(1)
             
+            if validators is not None:
+                validators.clear()
+                for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+                    value = response.headers.get(header)
+                    if value:
+                        validators[key] = value
+            
             return data
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON response from ESI API: {e}")
         sys.exit(1)
-    except (URLError, HTTPError) as e:
+    except HTTPError as e:
+        if e.code == 304:
+            return NOT_MODIFIED
         print(f"Error fetching ESI compatibility dates from {ESI_COMPAT_URL}: {e}")
         sys.exit(1)
+    except URLError as e:
+        print(f"Error fetching ESI compatibility dates from {ESI_COMPAT_URL}: {e}")
+        sys.exit(1)
+    except (gzip.BadGzipFile, EOFError, zlib.error) as e:
+        print(f"Error decompressing gzip response from ESI API: {e}")
+        sys.exit(1)
+
+
+def _cached_fetch(
+    ttl_seconds: float,
+    validators: Optional[Dict[str, str]] = None,
+    cache_file: str = ESI_CACHE_FILE
+) -> Dict[str, Any]:
+    """Fetch ESI compatibility dates, serving from a local cache within the TTL.
+    
+    The cache entry records ESI_COMPAT_URL, so a cache written for another
+    endpoint is never served.
+    
+    Args:
+        ttl_seconds: Maximum age of the cache file in seconds. 0 disables caching.
+        validators: Passed through to fetch_esi_compatibility_dates.
+        cache_file: Path to the JSON cache file.
+    
+    Returns:
+        The cached JSON object if fresh, otherwise the result of
+        fetch_esi_compatibility_dates.
+    """
+    if ttl_seconds > 0:
+        try:
+            if time.time() - os.stat(cache_file).st_mtime < ttl_seconds:
+                with open(cache_file, 'r') as f:
+                    cached = json.load(f)
+                if isinstance(cached, dict) and cached.get("url") == ESI_COMPAT_URL:
+                    print(f"Using cached ESI response from {cache_file}")
+                    return cached["data"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    data = fetch_esi_compatibility_dates(validators)
+
+    if ttl_seconds > 0 and data is not NOT_MODIFIED:
+        try:
+            _atomic_write(cache_file, json.dumps({"url": ESI_COMPAT_URL, "data": data}))
+        except OSError as e:
+            print(f"Error writing ESI cache to {cache_file}: {e}")
+
+    return data
 
 
 def extract_compatibility_dates(dates_data: Union[Dict[str, Any], List[str]]) -> List[str]:
@@ -83,9 +274,44 @@ def extract_compatibility_dates(dates_data: Union[Dict[str, Any], List[str]]) ->
     raise ValueError(f"Unexpected data type: {type(dates_data).__name__}")
 
 
+def _has_iso_date_prefix(date_str: str) -> bool:
+    """Return True if date_str starts with a zero-padded YYYY-MM-DD date."""
+    return (
+        len(date_str) >= 10
+        and date_str[4] == '-'
+        and date_str[7] == '-'
+        and date_str[:10].replace('-', '').isdigit()
+    )
+
+
+def compute_dates_digest(dates_data: Union[Dict[str, Any], List[str]]) -> Optional[str]:
+    """Compute a BLAKE2b-128 digest of the full compatibility dates list.
+    
+    The list is sorted first so the digest does not depend on the order ESI
+    returns the dates in.
+    
+    Args:
+        dates_data: Either a dict with 'compatibility_dates' key or a list of date strings.
+    
+    Returns:
+        A 32 character hex digest, or None if the dates can't be extracted.
+    """
+    try:
+        dates = sorted(extract_compatibility_dates(dates_data))
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(json.dumps(dates).encode(), digest_size=16).hexdigest()
+
+
+@functools.lru_cache(maxsize=256)
 def parse_iso_date(date_str: str) -> datetime:
     """Parse a date string in YYYY-MM-DD or ISO 8601 format.
     
+    Results are memoized. This only matters for inputs get_latest_date cannot
+    compare as plain strings (non-padded or otherwise odd-shaped dates):
+    zero-padded ESI dates take its string fast path, and an unchanged list
+    is skipped by the digest check before any parsing.
+    
     Args:
         date_str: Date string to parse.
     
@@ -95,7 +321,17 @@ def parse_iso_date(date_str: str) -> datetime:
     Raises:
         ValueError: If the date string cannot be parsed.
     """
-    # Try parsing as simple YYYY-MM-DD format first
+    from datetime import datetime
+
+    # Fast path: hand the YYYY-MM-DD prefix (with or without a time part) to
+    # the C-level fromisoformat; the time part is dropped, as below
+    if _has_iso_date_prefix(date_str) and (len(date_str) == 10 or date_str[10] == 'T'):
+        try:
+            return datetime.fromisoformat(date_str[:10])
+        except ValueError:
+            pass
+    
+    # Try parsing as simple YYYY-MM-DD format
     try:
         return datetime.strptime(date_str, "%Y-%m-%d")
     except ValueError:
@@ -133,35 +369,61 @@ def get_latest_date(dates_data: Union[Dict[str, Any], List[str]]) -> Optional[st
     if not dates:
         return None
     
-    # Parse all dates and find the latest one
+    # Zero-padded YYYY-MM-DD strings sort chronologically, so no parsing is
+    # needed when every entry has that shape (always the case for ESI)
+    if all(isinstance(d, str) and _has_iso_date_prefix(d) for d in dates):
+        return max(dates)
+    
+    # Single pass over the dates, parsing each one once
     try:
-        parsed_dates = [(date_str, parse_iso_date(date_str)) for date_str in dates]
-        # Sort by parsed datetime and get the latest
-        parsed_dates.sort(key=lambda x: x[1])
-        return parsed_dates[-1][0] if parsed_dates else None
+        return max(dates, key=parse_iso_date)
     except ValueError as e:
         print(f"Error parsing dates: {e}")
-        # Fallback to simple string sorting
-        sorted_dates = sorted(dates)
-        return sorted_dates[-1] if sorted_dates else None
+        # Fallback to lexicographic order (correct for YYYY-MM-DD)
+        return max(dates)
+
+
+def _atomic_write(file_path: str, content: str) -> None:
+    """Write content to file_path atomically.
+    
+    Writes to a temporary sibling file, fsyncs it and renames it over the
+    target, so a crash never leaves a truncated file behind.
+    
+    Raises:
+        OSError: On write errors.
+    """
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
 
 
 def read_last_known_date(file_path: str) -> Optional[str]:
     """Read the last known compatibility date from file.
     
+    The content is cached and only re-read when the file's inode, mtime or
+    size changed since the last read.
+    
     Args:
         file_path: Path to the file containing the last known date.
     
     Returns:
         The last known date string, or None if file doesn't exist or is empty.
     """
-    if not os.path.exists(file_path):
-        return None
-    
     try:
-        with open(file_path, 'r') as f:
-            content = f.read().strip()
-            return content if content else None
+        st = os.stat(file_path)
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = _state_cache.get(file_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        value = Path(file_path).read_text().strip() or None
+        _state_cache[file_path] = (key, value)
+        return value
+    except FileNotFoundError:
+        _state_cache.pop(file_path, None)
+        return None
     except Exception as e:
         print(f"Error reading last known date from {file_path}: {e}")
         return None
@@ -177,20 +439,104 @@ def write_latest_date(file_path: str, date: str) -> None:
     Raises:
         SystemExit: On write errors.
     """
+    _state_cache.pop(file_path, None)
     try:
-        with open(file_path, 'w') as f:
-            f.write(date)
+        _atomic_write(file_path, date)
     except Exception as e:
         print(f"Error writing latest date to {file_path}: {e}")
         sys.exit(1)
 
 
+def read_last_digest(file_path: str) -> Optional[str]:
+    """Read the digest of the last seen compatibility dates list from file.
+    
+    Args:
+        file_path: Path to the file containing the digest.
+    
+    Returns:
+        The digest string, or None if file doesn't exist or is empty.
+    """
+    try:
+        return Path(file_path).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading last digest from {file_path}: {e}")
+        return None
+
+
+def write_last_digest(file_path: str, digest: str) -> None:
+    """Write the digest of the compatibility dates list to file.
+    
+    Args:
+        file_path: Path to the file to write.
+        digest: Digest string to write.
+    
+    Raises:
+        SystemExit: On write errors.
+    """
+    try:
+        _atomic_write(file_path, digest)
+    except Exception as e:
+        print(f"Error writing last digest to {file_path}: {e}")
+        sys.exit(1)
+
+
+def read_cache_validators(file_path: str) -> Dict[str, str]:
+    """Read the ETag/Last-Modified validators of the last ESI response.
+    
+    Args:
+        file_path: Path to the JSON file containing the validators.
+    
+    Returns:
+        A dict with "etag" and/or "last_modified" keys, or an empty dict if the
+        file doesn't exist or can't be parsed.
+    """
+    try:
+        data = json.loads(Path(file_path).read_text())
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Error reading cache validators from {file_path}: {e}")
+        return {}
+    
+    if not isinstance(data, dict):
+        return {}
+    return {key: value for key, value in data.items() if isinstance(value, str)}
+
+
+def write_cache_validators(file_path: str, validators: Dict[str, Optional[str]]) -> None:
+    """Write the ETag/Last-Modified validators of the last ESI response.
+    
+    An empty dict removes the file, so validators the server no longer sends
+    are not replayed on the next run.
+    
+    Args:
+        file_path: Path to the JSON file to write.
+        validators: Dict with "etag" and "last_modified" keys.
+    
+    Raises:
+        SystemExit: On write errors.
+    """
+    try:
+        if validators:
+            _atomic_write(file_path, json.dumps(validators))
+        else:
+            Path(file_path).unlink(missing_ok=True)
+    except Exception as e:
+        print(f"Error writing cache validators to {file_path}: {e}")
+        sys.exit(1)
+
+
 def post_to_discord(
     webhook_url: str,
     user_agent: str,
     message: str
 ) -> None:
     """Post a message to Discord via webhook with improved diagnostics."""
+    from urllib import request
+    from urllib.error import HTTPError, URLError
+
     if not webhook_url:
         print("Error: Discord webhook URL not provided")
         sys.exit(1)
@@ -201,20 +547,21 @@ def post_to_discord(
 
     payload: dict[str, str] = {"content": message}
 
-    data = json.dumps(payload).encode("utf-8")
+    # Compact separators and raw UTF-8 keep the body small
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
 
     req = request.Request(
         webhook_url,
         data=data,
-        headers={
-            "Content-Type": "application/json",
-            "User-Agent": user_agent
-        },
+        headers={**_DISCORD_HEADERS, "User-Agent": user_agent},
         method="POST"
     )
 
     try:
-        with request.urlopen(req, timeout=10) as response:
+        with _retry(
+            lambda: request.urlopen(req, timeout=10),
+            retry_statuses=POST_RETRYABLE_STATUS_CODES
+        ) as response:
             status = response.status
             if status == 204:
                 print("Successfully posted to Discord (204 No Content)")
@@ -238,7 +585,64 @@ def post_to_discord(
         sys.exit(1)
 
 
-def parse_args() -> argparse.Namespace:
+def post_to_discord_many(
+    webhook_urls: List[str],
+    user_agent: str,
+    message: str
+) -> None:
+    """Post a message to several Discord webhooks concurrently.
+    
+    Every webhook is attempted even if others fail; each failure is reported
+    on its own.
+    
+    Args:
+        webhook_urls: Discord webhook URLs to post to.
+        user_agent: User-Agent header sent with each request.
+        message: Message content to post.
+    
+    Raises:
+        SystemExit: If any of the posts failed.
+    """
+    if len(webhook_urls) == 1:
+        post_to_discord(webhook_urls[0], user_agent, message)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=len(webhook_urls)) as executor:
+        futures = [
+            executor.submit(post_to_discord, url, user_agent, message)
+            for url in webhook_urls
+        ]
+
+    failed = 0
+    for index, future in enumerate(futures, start=1):
+        try:
+            future.result()
+        except SystemExit:
+            print(f"Discord webhook #{index} failed")
+            failed += 1
+
+    if failed:
+        print(f"Error: {failed} of {len(webhook_urls)} Discord posts failed")
+        sys.exit(1)
+
+
+# Values parse_args returns when no CLI arguments are given; must match the
+# defaults declared in _build_parser
+_DEFAULT_ARGS: Dict[str, Any] = {
+    "force_post": False,
+    "always_success": False,
+    "cache_ttl": DEFAULT_CACHE_TTL,
+    "watch": False,
+    "min_interval": DEFAULT_MIN_INTERVAL,
+    "max_interval": DEFAULT_MAX_INTERVAL,
+}
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    import argparse
+
     parser = argparse.ArgumentParser(description="Check ESI updates and notify Discord.")
     parser.add_argument(
         "--force-post",
@@ -250,68 +654,200 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Do not exit with error on Discord post failure (useful for testing)."
     )
-    return parser.parse_args()
-
-
-def main() -> None:
-    """Main function to check ESI updates and notify Discord."""
-    args = parse_args()
-
-    discord_webhook = os.environ.get("DISCORD_WEBHOOK_URL")
-    if not discord_webhook:
-        print("Error: DISCORD_WEBHOOK_URL environment variable not set")
-        sys.exit(1)
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help=f"Seconds to reuse the cached ESI response in {ESI_CACHE_FILE} "
+             f"(default: {DEFAULT_CACHE_TTL}, 0 disables the cache)."
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-check periodically instead of exiting after one check."
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=DEFAULT_MIN_INTERVAL,
+        help=f"Seconds between checks in --watch mode after a change "
+             f"(default: {DEFAULT_MIN_INTERVAL}); doubles after each unchanged check."
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=DEFAULT_MAX_INTERVAL,
+        help=f"Upper bound in seconds for the --watch interval (default: {DEFAULT_MAX_INTERVAL})."
+    )
+    return parser
+
+
+def parse_args() -> Union[argparse.Namespace, SimpleNamespace]:
+    """Parse CLI arguments, skipping argparse entirely when none are given."""
+    if len(sys.argv) == 1:
+        return SimpleNamespace(**_DEFAULT_ARGS)
+    parser = _build_parser()
+    args = parser.parse_args()
+    if args.min_interval <= 0 or args.max_interval < args.min_interval:
+        parser.error("--min-interval must be positive and not larger than --max-interval")
+    return args
+
+
+def check_once(
+    args: Union[argparse.Namespace, SimpleNamespace],
+    discord_webhooks: List[str],
+    user_agent: str
+) -> bool:
+    """Run a single check of the ESI compatibility date.
+    
+    Posts to Discord and updates the state files when the date changed.
+    
+    Returns:
+        True if a new compatibility date was announced and recorded.
+    
+    Raises:
+        SystemExit: On unrecoverable fetch, post or write errors.
+    """
+    posted = False
+    last_known_date = read_last_known_date(LAST_DATE_FILE)
 
-    user_agent = os.environ.get("USER_AGENT")
-    if not user_agent:
-        print("Error: USER_AGENT environment variable not set")
-        sys.exit(1)
+    # Only ask for a 304 when there is a known date to compare against and we
+    # are not forcing a post (a forced post needs the full payload).
+    validators: Dict[str, str] = {}
+    if last_known_date and not args.force_post:
+        validators = read_cache_validators(LAST_HEADERS_FILE)
+    stored_validators = dict(validators)
 
     print("Fetching ESI compatibility dates...")
-    dates_data = fetch_esi_compatibility_dates()
+    dates_data = _cached_fetch(args.cache_ttl, validators)
+
+    if dates_data is NOT_MODIFIED:
+        print("ESI compatibility dates not modified (304); no change in compatibility date")
+        return False
 
     if isinstance(dates_data, dict):
         print(f"Received JSON object with keys: {list(dates_data.keys())}")
     else:
         print(f"Received data type: {type(dates_data).__name__}")
 
-    latest_date = get_latest_date(dates_data)
-    if not latest_date:
-        print("Error: No valid dates found in ESI API response")
-        sys.exit(1)
+    # Identical dates list (and a known date): nothing can have changed
+    digest = compute_dates_digest(dates_data)
+    last_digest = read_last_digest(LAST_DIGEST_FILE)
+    payload_changed = digest is None or digest != last_digest or last_known_date is None
 
-    print(f"Latest compatibility date: {latest_date}")
+    if not payload_changed and not args.force_post:
+        print("Compatibility dates list unchanged (same digest); no change in compatibility date")
+    else:
+        latest_date = get_latest_date(dates_data)
+        if not latest_date:
+            print("Error: No valid dates found in ESI API response")
+            sys.exit(1)
+
+        print(f"Latest compatibility date: {latest_date}")
+        print(f"Last known date: {last_known_date}")
+
+        date_changed = (last_known_date != latest_date)
+        if date_changed or args.force_post:
+            reason = "Compatibility date has changed!" if date_changed else "--force-post override"
+            print(reason)
+
+            message = f"The compatibility date of ESI has been updated to {latest_date}"
+            print(f"Posting to Discord: {message}")
+
+            try:
+                post_to_discord_many(
+                    discord_webhooks,
+                    user_agent,
+                    message
+                )
+            except SystemExit as e:
+                if args.always_success:
+                    print(f"Discord post failed but continuing due to --always-success (exit code {e.code})")
+                else:
+                    raise
+
+            if date_changed:
+                write_latest_date(LAST_DATE_FILE, latest_date)
+                posted = True
+                print("Updated last known date")
+            else:
+                print("Not updating last known date (forced post).")
+        else:
+            print("No change in compatibility date")
 
-    last_known_date = read_last_known_date(LAST_DATE_FILE)
-    print(f"Last known date: {last_known_date}")
+        if digest and payload_changed:
+            write_last_digest(LAST_DIGEST_FILE, digest)
 
-    date_changed = (last_known_date != latest_date)
-    if date_changed or args.force_post:
-        reason = "Compatibility date has changed!" if date_changed else "--force-post override"
-        print(reason)
+    # Persist validators only once the date has been handled, so a failed post
+    # is retried on the next run instead of being masked by a 304.
+    if validators != stored_validators:
+        write_cache_validators(LAST_HEADERS_FILE, validators)
 
-        message = f"The compatibility date of ESI has been updated to {latest_date}"
-        print(f"Posting to Discord: {message}")
+    return posted
 
-        try:
-            post_to_discord(
-                discord_webhook,
-                user_agent,
-                message
-            )
-        except SystemExit as e:
-            if args.always_success:
-                print(f"Discord post failed but continuing due to --always-success (exit code {e.code})")
-            else:
-                raise
 
-        if date_changed:
-            write_latest_date(LAST_DATE_FILE, latest_date)
-            print("Updated last known date")
-        else:
-            print("Not updating last known date (forced post).")
+def watch(
+    args: Union[argparse.Namespace, SimpleNamespace],
+    discord_webhooks: List[str],
+    user_agent: str
+) -> None:
+    """Check repeatedly, backing off while nothing changes.
+    
+    The interval starts at --min-interval, doubles after every check without a
+    change (up to --max-interval) and resets after a change. Up to 10% jitter is
+    added to each sleep. Failed checks are logged and count as unchanged.
+    The local response cache is disabled. Returns when interrupted with Ctrl-C.
+    """
+    # The loop spaces out fetches itself; a cached response would hide a new
+    # date for up to --cache-ttl seconds and keep the backoff growing on it
+    args.cache_ttl = 0
+
+    interval = args.min_interval
+    try:
+        while True:
+            try:
+                changed = check_once(args, discord_webhooks, user_agent)
+            except SystemExit as e:
+                print(f"Check failed (exit code {e.code}); will retry")
+                changed = False
+            except Exception as e:
+                # Network errors outside _retry (e.g. a timeout while reading
+                # the body) must not end the watch loop
+                print(f"Check failed ({type(e).__name__}: {e}); will retry")
+                changed = False
+
+            # --force-post applies to the first check only
+            args.force_post = False
+
+            interval = args.min_interval if changed else min(args.max_interval, interval * 2)
+            delay = interval + random.uniform(0, interval * 0.1)
+            print(f"Next check in {delay:.0f}s")
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+
+def main() -> None:
+    """Main function to check ESI updates and notify Discord."""
+    args = parse_args()
+
+    discord_webhooks = [
+        url.strip() for url in os.environ.get("DISCORD_WEBHOOK_URL", "").split(",")
+        if url.strip()
+    ]
+    if not discord_webhooks:
+        print("Error: DISCORD_WEBHOOK_URL environment variable not set")
+        sys.exit(1)
+
+    user_agent = os.environ.get("USER_AGENT")
+    if not user_agent:
+        print("Error: USER_AGENT environment variable not set")
+        sys.exit(1)
+
+    if args.watch:
+        watch(args, discord_webhooks, user_agent)
     else:
-        print("No change in compatibility date")
+        check_once(args, discord_webhooks, user_agent)
 
 if __name__ == "__main__":
     main()
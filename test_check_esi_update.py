@@ -3,191 +3,664 @@
 Unit tests for check_esi_update.py
 """
 
+import gzip
 import json
 import os
 import sys
-import tempfile
-import unittest
 from datetime import datetime
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
+from urllib.error import HTTPError, URLError
 
-# Add scripts directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+import pytest
 
-import check_esi_update
+# Canned ESI response bodies, encoded once at import
+_DATES_DICT = {"compatibility_dates": ["2024-05-01", "2024-06-15"]}
+_PAYLOAD_DICT = json.dumps(_DATES_DICT).encode()
+_PAYLOAD_LIST = json.dumps(["2024-05-01"]).encode()
+_PAYLOAD_INVALID = b"not valid json"
 
+# Webhook URL the check_once and post tests route to
+_WEBHOOK = "https://discord.com/api/webhooks/test"
 
-class TestESIUpdateChecker(unittest.TestCase):
-    """Test cases for ESI update checker functions."""
+# Expected parse_iso_date results
+_D_2024_06_15 = datetime(2024, 6, 15)
+_D_2024_06_05 = datetime(2024, 6, 5)
 
-    def test_extract_compatibility_dates_from_dict(self):
-        """Test extracting dates from dict response."""
-        data = {"compatibility_dates": ["2024-05-01", "2024-06-15", "2024-03-20"]}
-        result = check_esi_update.extract_compatibility_dates(data)
-        self.assertEqual(result, ["2024-05-01", "2024-06-15", "2024-03-20"])
-
-    def test_extract_compatibility_dates_from_list(self):
-        """Test extracting dates from list response (backward compatibility)."""
-        data = ["2024-05-01", "2024-06-15", "2024-03-20"]
-        result = check_esi_update.extract_compatibility_dates(data)
-        self.assertEqual(result, ["2024-05-01", "2024-06-15", "2024-03-20"])
-
-    def test_extract_compatibility_dates_missing_key(self):
-        """Test extracting dates from dict without compatibility_dates key."""
-        data = {"other_key": ["2024-05-01"]}
-        with self.assertRaises(ValueError) as context:
-            check_esi_update.extract_compatibility_dates(data)
-        self.assertIn("Missing 'compatibility_dates' key", str(context.exception))
-
-    def test_extract_compatibility_dates_invalid_type(self):
-        """Test extracting dates from invalid type."""
-        with self.assertRaises(ValueError) as context:
-            check_esi_update.extract_compatibility_dates("invalid")
-        self.assertIn("Unexpected data type", str(context.exception))
-
-    def test_parse_iso_date_simple_format(self):
-        """Test parsing simple YYYY-MM-DD date."""
-        result = check_esi_update.parse_iso_date("2024-06-15")
-        self.assertEqual(result, datetime(2024, 6, 15))
-
-    def test_parse_iso_date_with_time(self):
-        """Test parsing ISO 8601 date with time."""
-        result = check_esi_update.parse_iso_date("2024-06-15T10:30:00Z")
-        self.assertEqual(result, datetime(2024, 6, 15))
-
-    def test_parse_iso_date_invalid(self):
-        """Test parsing invalid date string."""
-        with self.assertRaises(ValueError):
-            check_esi_update.parse_iso_date("not-a-date")
-
-    def test_get_latest_date_with_dict_data(self):
-        """Test getting latest date from dict response."""
+
+@pytest.fixture(scope="session")
+def check_esi_update():
+    """The module under test, imported on first use instead of at collection."""
+    import check_esi_update as module
+    return module
+
+
+class _FakeResp:
+    """Minimal stand-in for the response object returned by urlopen()."""
+
+    def __init__(self, body=b"", status=200, headers=None):
+        self._body = body
+        self.status = status
+        self.headers = headers or {}
+
+    def read(self):
+        return self._body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture
+def fake_urlopen(monkeypatch):
+    """Install a fake urlopen() answering every request the same way.
+    
+    Call it with the response body/status/headers, or with error= to raise
+    instead. routes= maps URL prefixes to a _FakeResp or an exception that
+    overrides the default for matching requests. Returns the list the issued
+    requests are recorded in.
+    """
+    def _install(body=b"", status=200, headers=None, error=None, routes=None):
+        requests = []
+        
+        def urlopen(req, timeout=None):
+            requests.append(req)
+            for prefix, answer in (routes or {}).items():
+                if req.full_url.startswith(prefix):
+                    if isinstance(answer, Exception):
+                        raise answer
+                    return answer
+            if error is not None:
+                raise error
+            return _FakeResp(body, status, headers)
+        
+        monkeypatch.setattr("urllib.request.urlopen", urlopen)
+        return requests
+    return _install
+
+
+@pytest.mark.parametrize("data,expected", [
+    # Dict response
+    ({"compatibility_dates": ["2024-05-01", "2024-06-15", "2024-03-20"]},
+     ["2024-05-01", "2024-06-15", "2024-03-20"]),
+    # List response (backward compatibility)
+    (["2024-05-01", "2024-06-15", "2024-03-20"],
+     ["2024-05-01", "2024-06-15", "2024-03-20"]),
+])
+def test_extract_compatibility_dates(data, expected, check_esi_update):
+    """Test extracting dates from dict and list responses."""
+    assert check_esi_update.extract_compatibility_dates(data) == expected
+
+
+@pytest.mark.parametrize("data,message", [
+    ({"other_key": ["2024-05-01"]}, "Missing 'compatibility_dates' key"),
+    ("invalid", "Unexpected data type"),
+])
+def test_extract_compatibility_dates_invalid(data, message, check_esi_update):
+    """Test extracting dates from responses without a dates list."""
+    with pytest.raises(ValueError, match=message):
+        check_esi_update.extract_compatibility_dates(data)
+
+
+@pytest.mark.parametrize("date_str,expected", [
+    ("2024-06-15", _D_2024_06_15),
+    # ISO 8601 with time: the time part is dropped
+    ("2024-06-15T10:30:00Z", _D_2024_06_15),
+    # Not zero-padded: falls back to strptime
+    ("2024-6-5", _D_2024_06_05),
+])
+def test_parse_iso_date(date_str, expected, check_esi_update):
+    """Test parsing YYYY-MM-DD and ISO 8601 dates."""
+    assert check_esi_update.parse_iso_date(date_str) == expected
+
+
+def test_parse_iso_date_is_cached(check_esi_update):
+    """Test repeated strings are served from the cache."""
+    check_esi_update.parse_iso_date.cache_clear()
+    first = check_esi_update.parse_iso_date("2024-06-15")
+    assert check_esi_update.parse_iso_date("2024-06-15") is first
+    assert check_esi_update.parse_iso_date.cache_info().hits == 1
+
+
+def test_parse_iso_date_invalid(check_esi_update):
+    """Test parsing invalid date string."""
+    with pytest.raises(ValueError):
+        check_esi_update.parse_iso_date("not-a-date")
+
+
+@pytest.mark.parametrize("data,expected", [
+    ({"compatibility_dates": ["2024-05-01", "2024-06-15", "2024-03-20"]}, "2024-06-15"),
+    # List response (backward compatibility)
+    (["2024-05-01", "2024-06-15", "2024-03-20"], "2024-06-15"),
+    (["2024-05-01"], "2024-05-01"),
+    ([], None),
+    ({"compatibility_dates": []}, None),
+    (None, None),
+    ({"compatibility_dates": [
+        "2024-05-01T00:00:00Z",
+        "2024-06-15T12:30:00Z",
+        "2024-03-20T08:15:00Z"
+    ]}, "2024-06-15T12:30:00Z"),
+    # Not zero-padded: compared chronologically, not lexicographically
+    (["2024-10-01", "2024-9-15"], "2024-10-01"),
+])
+def test_get_latest_date(data, expected, check_esi_update):
+    """Test getting the latest date from the various response shapes."""
+    assert check_esi_update.get_latest_date(data) == expected
+
+
+def test_get_latest_date_skips_parsing_for_iso_dates(check_esi_update):
+    """Test well-formed YYYY-MM-DD dates are compared without parsing."""
+    with patch.object(
+        check_esi_update, 'parse_iso_date', wraps=check_esi_update.parse_iso_date
+    ) as mock_parse:
         data = {"compatibility_dates": ["2024-05-01", "2024-06-15", "2024-03-20"]}
         result = check_esi_update.get_latest_date(data)
-        self.assertEqual(result, "2024-06-15")
+        assert result == "2024-06-15"
+        mock_parse.assert_not_called()
 
-    def test_get_latest_date_with_valid_data(self):
-        """Test getting latest date from valid list data (backward compatibility)."""
-        dates = ["2024-05-01", "2024-06-15", "2024-03-20"]
-        result = check_esi_update.get_latest_date(dates)
-        self.assertEqual(result, "2024-06-15")
 
-    def test_get_latest_date_with_single_date(self):
-        """Test getting latest date with single date."""
-        dates = ["2024-05-01"]
+def test_get_latest_date_parses_each_date_once(check_esi_update):
+    """Test the parsing path parses every date exactly once."""
+    with patch.object(
+        check_esi_update, 'parse_iso_date', wraps=check_esi_update.parse_iso_date
+    ) as mock_parse:
+        dates = ["2024-9-15", "2024-10-01", "2024-03-20", "2024-1-02"]
         result = check_esi_update.get_latest_date(dates)
-        self.assertEqual(result, "2024-05-01")
+        assert result == "2024-10-01"
+        assert mock_parse.call_count == len(dates)
 
-    def test_get_latest_date_with_empty_list(self):
-        """Test getting latest date with empty list."""
-        dates = []
-        result = check_esi_update.get_latest_date(dates)
-        self.assertIsNone(result)
 
-    def test_get_latest_date_with_empty_dict(self):
-        """Test getting latest date with empty compatibility_dates in dict."""
-        data = {"compatibility_dates": []}
-        result = check_esi_update.get_latest_date(data)
-        self.assertIsNone(result)
-
-    def test_get_latest_date_with_none(self):
-        """Test getting latest date with None."""
-        result = check_esi_update.get_latest_date(None)
-        self.assertIsNone(result)
-    
-    def test_get_latest_date_with_iso_8601_dates(self):
-        """Test getting latest date with ISO 8601 formatted dates."""
-        data = {"compatibility_dates": [
-            "2024-05-01T00:00:00Z",
-            "2024-06-15T12:30:00Z",
-            "2024-03-20T08:15:00Z"
-        ]}
-        result = check_esi_update.get_latest_date(data)
-        self.assertEqual(result, "2024-06-15T12:30:00Z")
+def test_compute_dates_digest(check_esi_update):
+    """Test the digest ignores order but changes with content."""
+    digest = check_esi_update.compute_dates_digest(
+        {"compatibility_dates": ["2024-05-01", "2024-06-15"]}
+    )
+    assert len(digest) == 32
+    assert check_esi_update.compute_dates_digest(["2024-06-15", "2024-05-01"]) == digest
+    assert check_esi_update.compute_dates_digest(
+        ["2024-05-01", "2024-06-15", "2024-07-01"]
+    ) != digest
 
-    def test_read_write_last_known_date(self):
-        """Test reading and writing last known date."""
-        with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
-            temp_file = f.name
-        
-        try:
-            # Test writing
-            test_date = "2024-06-15"
-            check_esi_update.write_latest_date(temp_file, test_date)
-            
-            # Test reading
-            result = check_esi_update.read_last_known_date(temp_file)
-            self.assertEqual(result, test_date)
-        finally:
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
-
-    def test_read_last_known_date_nonexistent_file(self):
-        """Test reading from nonexistent file."""
-        result = check_esi_update.read_last_known_date("/tmp/nonexistent_file_12345.txt")
-        self.assertIsNone(result)
-    
-    def test_read_last_known_date_empty_file(self):
-        """Test reading from empty file."""
-        with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
-            temp_file = f.name
-            # Write nothing to create empty file
-        
-        try:
-            result = check_esi_update.read_last_known_date(temp_file)
-            self.assertIsNone(result)
-        finally:
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
-
-    @patch('check_esi_update.request.urlopen')
-    def test_fetch_esi_compatibility_dates_success(self, mock_urlopen):
-        """Test successful fetch of ESI dates with new JSON structure."""
-        mock_response = MagicMock()
-        test_data = {"compatibility_dates": ["2024-05-01", "2024-06-15"]}
-        mock_response.read.return_value = json.dumps(test_data).encode()
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
-        
-        result = check_esi_update.fetch_esi_compatibility_dates()
-        self.assertEqual(result, test_data)
-    
-    @patch('check_esi_update.request.urlopen')
-    def test_fetch_esi_compatibility_dates_invalid_json(self, mock_urlopen):
-        """Test fetch with invalid JSON response."""
-        mock_response = MagicMock()
-        mock_response.read.return_value = b"not valid json"
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
-        
-        with self.assertRaises(SystemExit):
-            check_esi_update.fetch_esi_compatibility_dates()
+
+def test_compute_dates_digest_invalid(check_esi_update):
+    """Test the digest of an invalid response is None."""
+    assert check_esi_update.compute_dates_digest({"other_key": []}) is None
+
+
+def test_read_write_last_known_date(tmp_path, check_esi_update):
+    """Test reading and writing last known date."""
+    p = tmp_path / "last_esi_date.txt"
+    check_esi_update.write_latest_date(str(p), "2024-06-15")
+    assert check_esi_update.read_last_known_date(str(p)) == "2024-06-15"
+
+
+def test_write_latest_date_replaces_atomically(tmp_path, check_esi_update):
+    """Test writing over an existing file leaves no temporary file."""
+    p = tmp_path / "last_esi_date.txt"
+    check_esi_update.write_latest_date(str(p), "2024-05-01")
+    check_esi_update.write_latest_date(str(p), "2024-06-15")
     
-    @patch('check_esi_update.request.urlopen')
-    def test_fetch_esi_compatibility_dates_wrong_type(self, mock_urlopen):
-        """Test fetch when API returns list instead of dict."""
-        mock_response = MagicMock()
-        mock_response.read.return_value = json.dumps(["2024-05-01"]).encode()
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
-        
-        with self.assertRaises(SystemExit):
+    assert check_esi_update.read_last_known_date(str(p)) == "2024-06-15"
+    assert [child.name for child in tmp_path.iterdir()] == ["last_esi_date.txt"]
+
+
+def test_read_last_known_date_uses_cache_until_file_changes(tmp_path, check_esi_update):
+    """Test an unchanged file is served from cache and a rewrite is picked up."""
+    p = tmp_path / "last_esi_date.txt"
+    check_esi_update.write_latest_date(str(p), "2024-05-01")
+    assert check_esi_update.read_last_known_date(str(p)) == "2024-05-01"
+    
+    with patch.object(check_esi_update.Path, 'read_text') as mock_read:
+        assert check_esi_update.read_last_known_date(str(p)) == "2024-05-01"
+        mock_read.assert_not_called()
+    
+    check_esi_update.write_latest_date(str(p), "2024-06-15")
+    assert check_esi_update.read_last_known_date(str(p)) == "2024-06-15"
+
+
+def test_read_last_known_date_nonexistent_file(tmp_path, check_esi_update):
+    """Test reading from nonexistent file."""
+    result = check_esi_update.read_last_known_date(str(tmp_path / "missing.txt"))
+    assert result is None
+
+
+def test_read_last_known_date_empty_file(tmp_path, check_esi_update):
+    """Test reading from empty file."""
+    p = tmp_path / "last_esi_date.txt"
+    p.touch()
+    assert check_esi_update.read_last_known_date(str(p)) is None
+
+
+@pytest.mark.parametrize("payload,expected", [
+    (_PAYLOAD_DICT, _DATES_DICT),
+    # Invalid JSON
+    (_PAYLOAD_INVALID, SystemExit),
+    # List instead of the expected JSON object
+    (_PAYLOAD_LIST, SystemExit),
+])
+def test_fetch_esi_compatibility_dates(fake_urlopen, check_esi_update, payload, expected):
+    """Test fetching ESI dates and rejecting malformed responses."""
+    fake_urlopen(payload)
+    
+    if isinstance(expected, type) and issubclass(expected, BaseException):
+        with pytest.raises(expected):
             check_esi_update.fetch_esi_compatibility_dates()
+    else:
+        assert check_esi_update.fetch_esi_compatibility_dates() == expected
+
+
+def test_fetch_esi_compatibility_dates_gzip(fake_urlopen, check_esi_update):
+    """Test fetch asks for gzip and decompresses a gzip response."""
+    requests = fake_urlopen(gzip.compress(_PAYLOAD_DICT), headers={"Content-Encoding": "gzip"})
+    
+    result = check_esi_update.fetch_esi_compatibility_dates()
+    assert result == _DATES_DICT
+    req, = requests
+    assert req.get_header("Accept-encoding") == "gzip"
+
+
+def test_fetch_esi_compatibility_dates_captures_validators(fake_urlopen, check_esi_update):
+    """Test fetch stores ETag/Last-Modified of a 200 response."""
+    fake_urlopen(
+        json.dumps({"compatibility_dates": []}).encode(),
+        headers={"ETag": '"abc"', "Last-Modified": "Thu, 06 Nov 2025 11:00:00 GMT"}
+    )
+    
+    validators = {}
+    check_esi_update.fetch_esi_compatibility_dates(validators)
+    assert validators == {
+        "etag": '"abc"',
+        "last_modified": "Thu, 06 Nov 2025 11:00:00 GMT",
+    }
+
+
+def test_fetch_esi_compatibility_dates_not_modified(fake_urlopen, check_esi_update):
+    """Test fetch sends conditional headers and handles 304 Not Modified."""
+    requests = fake_urlopen(error=HTTPError(
+        check_esi_update.ESI_COMPAT_URL, 304, "Not Modified", {}, None
+    ))
+    
+    validators = {"etag": '"abc"', "last_modified": "Thu, 06 Nov 2025 11:00:00 GMT"}
+    result = check_esi_update.fetch_esi_compatibility_dates(validators)
+    assert result is check_esi_update.NOT_MODIFIED
+    
+    req, = requests
+    assert req.get_header("If-none-match") == '"abc"'
+    assert req.get_header("If-modified-since") == "Thu, 06 Nov 2025 11:00:00 GMT"
+
+
+def test_cached_fetch_hit(fake_urlopen, tmp_path, check_esi_update):
+    """Test a fresh cache file is served without touching the network."""
+    requests = fake_urlopen()
+    test_data = {"compatibility_dates": ["2024-05-01"]}
+    p = tmp_path / "esi_cache.json"
+    p.write_text(json.dumps({"url": check_esi_update.ESI_COMPAT_URL, "data": test_data}))
+    
+    result = check_esi_update._cached_fetch(300, cache_file=str(p))
+    assert result == test_data
+    assert requests == []
+
+
+def test_cached_fetch_ignores_other_url(fake_urlopen, tmp_path, check_esi_update):
+    """Test a cache file written for another URL is not served."""
+    test_data = {"compatibility_dates": ["2024-06-15"]}
+    requests = fake_urlopen(json.dumps(test_data).encode())
+    p = tmp_path / "esi_cache.json"
+    p.write_text(json.dumps({"url": "https://example.com/other", "data": {}}))
+    
+    result = check_esi_update._cached_fetch(300, cache_file=str(p))
+    assert result == test_data
+    assert len(requests) == 1
+
+
+def test_cached_fetch_expired(fake_urlopen, tmp_path, check_esi_update):
+    """Test an expired cache file is refreshed from the network."""
+    test_data = {"compatibility_dates": ["2024-06-15"]}
+    fake_urlopen(json.dumps(test_data).encode())
+    p = tmp_path / "esi_cache.json"
+    p.write_text(json.dumps({"url": check_esi_update.ESI_COMPAT_URL, "data": {}}))
+    os.utime(p, (0, 0))
+    
+    result = check_esi_update._cached_fetch(300, cache_file=str(p))
+    assert result == test_data
+    assert json.loads(p.read_text())["data"] == test_data
+
+
+@patch('check_esi_update.time.sleep')
+def test_retry_recovers_from_transient_errors(mock_sleep, check_esi_update):
+    """Test retryable failures are retried until success."""
+    fn = MagicMock(side_effect=[
+        URLError("connection reset"),
+        HTTPError("https://example.com", 503, "Service Unavailable", {}, None),
+        "ok",
+    ])
+    result = check_esi_update._retry(fn, base=1.0, cap=30.0)
+    assert result == "ok"
+    assert fn.call_count == 3
+    assert mock_sleep.call_count == 2
+    for (delay,), _ in mock_sleep.call_args_list:
+        assert delay <= 30.0
+
+
+@patch('check_esi_update.time.sleep')
+def test_retry_honors_retry_after(mock_sleep, check_esi_update):
+    """Test the Retry-After header sets the delay on 429."""
+    fn = MagicMock(side_effect=[
+        HTTPError("https://example.com", 429, "Too Many Requests", {"Retry-After": "2.5"}, None),
+        "ok",
+    ])
+    check_esi_update._retry(fn)
+    mock_sleep.assert_called_once_with(2.5)
 
-    @patch('check_esi_update.request.urlopen')
-    def test_post_to_discord_success(self, mock_urlopen):
-        """Test successful Discord post."""
-        mock_response = MagicMock()
-        mock_response.status = 204
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
-        
-        # Should not raise exception
-        check_esi_update.post_to_discord(
-            "https://discord.com/api/webhooks/test",
-            "Test message"
-        )
 
+@patch('check_esi_update.time.sleep')
+def test_retry_does_not_retry_client_errors(mock_sleep, check_esi_update):
+    """Test non-retryable HTTP errors are raised immediately."""
+    fn = MagicMock(side_effect=HTTPError("https://example.com", 404, "Not Found", {}, None))
+    with pytest.raises(HTTPError):
+        check_esi_update._retry(fn)
+    assert fn.call_count == 1
+    mock_sleep.assert_not_called()
 
-if __name__ == '__main__':
-    unittest.main()
+
+@patch('check_esi_update.time.sleep')
+def test_retry_gives_up_after_max_attempts(mock_sleep, check_esi_update):
+    """Test the last error is raised once attempts are exhausted."""
+    fn = MagicMock(side_effect=URLError("down"))
+    with pytest.raises(URLError):
+        check_esi_update._retry(fn, max_attempts=3)
+    assert fn.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_read_write_cache_validators(tmp_path, check_esi_update):
+    """Test reading and writing cache validators."""
+    p = tmp_path / "last_esi_headers.json"
+    validators = {"etag": '"abc"', "last_modified": None}
+    check_esi_update.write_cache_validators(str(p), validators)
+    
+    assert check_esi_update.read_cache_validators(str(p)) == {"etag": '"abc"'}
+    
+    check_esi_update.write_cache_validators(str(p), {})
+    assert not p.exists()
+
+
+def test_post_to_discord_success(monkeypatch, check_esi_update):
+    """Test successful Discord post."""
+    monkeypatch.setattr(
+        "urllib.request.urlopen",
+        lambda req, timeout=None: _FakeResp(status=204)
+    )
+    
+    # Should not raise exception
+    check_esi_update.post_to_discord(
+        "https://discord.com/api/webhooks/test",
+        "TestAgent/1.0",
+        "Test message"
+    )
+
+
+def test_post_to_discord_request(fake_urlopen, check_esi_update):
+    """Test the Discord request body and headers."""
+    requests = fake_urlopen(status=204)
+    
+    check_esi_update.post_to_discord(
+        "https://discord.com/api/webhooks/test",
+        "TestAgent/1.0",
+        "Test message"
+    )
+    req, = requests
+    assert req.data == b'{"content":"Test message"}'
+    assert req.get_header("Content-type") == "application/json"
+    assert req.get_header("User-agent") == "TestAgent/1.0"
+
+
+@patch('check_esi_update.time.sleep')
+def test_post_to_discord_does_not_retry_server_errors(mock_sleep, fake_urlopen, check_esi_update):
+    """Test a 502 on the webhook POST is not retried, so the message is never sent twice."""
+    requests = fake_urlopen(error=HTTPError(_WEBHOOK, 502, "Bad Gateway", {}, None))
+    
+    with pytest.raises(SystemExit):
+        check_esi_update.post_to_discord(_WEBHOOK, "TestAgent/1.0", "Test message")
+    
+    assert len(requests) == 1
+    mock_sleep.assert_not_called()
+
+
+@patch('check_esi_update.time.sleep')
+def test_post_to_discord_retries_rate_limit(mock_sleep, fake_urlopen, check_esi_update):
+    """Test a 429 on the webhook POST is retried."""
+    requests = fake_urlopen(error=HTTPError(
+        _WEBHOOK, 429, "Too Many Requests", {"Retry-After": "1"}, None
+    ))
+    
+    with pytest.raises(SystemExit):
+        check_esi_update.post_to_discord(_WEBHOOK, "TestAgent/1.0", "Test message")
+    
+    assert len(requests) == 5
+
+
+@patch('check_esi_update.post_to_discord')
+def test_post_to_discord_many_posts_to_every_webhook(mock_post, check_esi_update):
+    """Test every webhook is posted to."""
+    urls = ["https://discord.com/api/webhooks/a", "https://discord.com/api/webhooks/b"]
+    check_esi_update.post_to_discord_many(urls, "TestAgent/1.0", "Test message")
+    assert sorted(call.args[0] for call in mock_post.call_args_list) == urls
+
+
+@patch('check_esi_update.post_to_discord')
+def test_post_to_discord_many_reports_failures(mock_post, check_esi_update):
+    """Test one failing webhook does not stop the others but still fails the run."""
+    def post(url, user_agent, message):
+        if url.endswith("/a"):
+            sys.exit(1)
+    mock_post.side_effect = post
+    urls = ["https://discord.com/api/webhooks/a", "https://discord.com/api/webhooks/b"]
+    
+    with pytest.raises(SystemExit):
+        check_esi_update.post_to_discord_many(urls, "TestAgent/1.0", "Test message")
+    assert mock_post.call_count == 2
+
+
+def test_parse_args_defaults_match_parser(check_esi_update):
+    """Test the no-argument shortcut returns the parser's defaults."""
+    with patch.object(sys, 'argv', ['check_esi_update.py']):
+        args = check_esi_update.parse_args()
+    assert vars(args) == vars(check_esi_update._build_parser().parse_args([]))
+
+
+def test_parse_args_with_flags(check_esi_update):
+    """Test CLI flags are parsed when given."""
+    with patch.object(sys, 'argv', ['check_esi_update.py', '--force-post', '--cache-ttl', '0']):
+        args = check_esi_update.parse_args()
+    assert args.force_post
+    assert args.cache_ttl == 0
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch, check_esi_update):
+    """Run check_once() against state files in an empty temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(check_esi_update, "_state_cache", {})
+    return tmp_path
+
+
+def _check_args(**overrides):
+    args = {"force_post": False, "always_success": False, "cache_ttl": 0}
+    args.update(overrides)
+    return SimpleNamespace(**args)
+
+
+def _discord_posts(requests):
+    return [req for req in requests if req.full_url == _WEBHOOK]
+
+
+def test_check_once_first_run_posts_and_writes_state(fake_urlopen, state_dir, check_esi_update):
+    """Test a fresh run posts the latest date and writes all three state files."""
+    requests = fake_urlopen(
+        _PAYLOAD_DICT, headers={"ETag": '"v1"'},
+        routes={_WEBHOOK: _FakeResp(status=204)}
+    )
+    
+    assert check_esi_update.check_once(_check_args(), [_WEBHOOK], "TestAgent/1.0")
+    
+    assert len(_discord_posts(requests)) == 1
+    assert (state_dir / "last_esi_date.txt").read_text() == "2024-06-15"
+    assert (state_dir / "last_esi_digest.txt").read_text() == \
+        check_esi_update.compute_dates_digest(_DATES_DICT)
+    assert json.loads((state_dir / "last_esi_headers.json").read_text()) == {"etag": '"v1"'}
+
+
+def test_check_once_not_modified_does_not_post(fake_urlopen, state_dir, check_esi_update):
+    """Test a 304 answer to the conditional request skips the post."""
+    (state_dir / "last_esi_date.txt").write_text("2024-06-15")
+    (state_dir / "last_esi_headers.json").write_text(json.dumps({"etag": '"v1"'}))
+    requests = fake_urlopen(error=HTTPError(
+        check_esi_update.ESI_COMPAT_URL, 304, "Not Modified", {}, None
+    ))
+    
+    assert not check_esi_update.check_once(_check_args(), [_WEBHOOK], "TestAgent/1.0")
+    
+    assert requests[0].get_header("If-none-match") == '"v1"'
+    assert not _discord_posts(requests)
+
+
+@patch('check_esi_update.time.sleep')
+def test_check_once_failed_post_is_retried_next_run(mock_sleep, fake_urlopen, state_dir, check_esi_update):
+    """Test a failed post leaves the date and validators alone so the next run posts again."""
+    (state_dir / "last_esi_date.txt").write_text("2024-05-01")
+    (state_dir / "last_esi_headers.json").write_text(json.dumps({"etag": '"v1"'}))
+    fake_urlopen(
+        _PAYLOAD_DICT, headers={"ETag": '"v2"'},
+        routes={_WEBHOOK: HTTPError(_WEBHOOK, 400, "Bad Request", {}, None)}
+    )
+    
+    with pytest.raises(SystemExit):
+        check_esi_update.check_once(_check_args(), [_WEBHOOK], "TestAgent/1.0")
+    
+    assert (state_dir / "last_esi_date.txt").read_text() == "2024-05-01"
+    assert json.loads((state_dir / "last_esi_headers.json").read_text()) == {"etag": '"v1"'}
+    
+    requests = fake_urlopen(
+        _PAYLOAD_DICT, headers={"ETag": '"v2"'},
+        routes={_WEBHOOK: _FakeResp(status=204)}
+    )
+    
+    assert check_esi_update.check_once(_check_args(), [_WEBHOOK], "TestAgent/1.0")
+    
+    assert requests[0].get_header("If-none-match") == '"v1"'
+    assert len(_discord_posts(requests)) == 1
+    assert (state_dir / "last_esi_date.txt").read_text() == "2024-06-15"
+    assert json.loads((state_dir / "last_esi_headers.json").read_text()) == {"etag": '"v2"'}
+
+
+def test_check_once_drops_validators_missing_from_response(fake_urlopen, state_dir, check_esi_update):
+    """Test validators are removed when a fresh response no longer carries any."""
+    (state_dir / "last_esi_date.txt").write_text("2024-05-01")
+    (state_dir / "last_esi_headers.json").write_text(json.dumps({"etag": '"v1"'}))
+    fake_urlopen(_PAYLOAD_DICT, routes={_WEBHOOK: _FakeResp(status=204)})
+    
+    assert check_esi_update.check_once(_check_args(), [_WEBHOOK], "TestAgent/1.0")
+    
+    assert not (state_dir / "last_esi_headers.json").exists()
+
+
+def test_check_once_force_post_skips_conditional_request(fake_urlopen, state_dir, check_esi_update):
+    """Test --force-post fetches the full list and posts without a date change."""
+    (state_dir / "last_esi_date.txt").write_text("2024-06-15")
+    (state_dir / "last_esi_headers.json").write_text(json.dumps({"etag": '"v1"'}))
+    requests = fake_urlopen(_PAYLOAD_DICT, routes={_WEBHOOK: _FakeResp(status=204)})
+    
+    assert not check_esi_update.check_once(
+        _check_args(force_post=True), [_WEBHOOK], "TestAgent/1.0"
+    )
+    
+    assert requests[0].get_header("If-none-match") is None
+    assert len(_discord_posts(requests)) == 1
+    assert (state_dir / "last_esi_date.txt").read_text() == "2024-06-15"
+
+
+def test_check_once_same_digest_skips_parsing(fake_urlopen, state_dir, check_esi_update):
+    """Test an unchanged dates list is neither parsed nor posted."""
+    (state_dir / "last_esi_date.txt").write_text("2024-06-15")
+    (state_dir / "last_esi_digest.txt").write_text(
+        check_esi_update.compute_dates_digest(_DATES_DICT)
+    )
+    requests = fake_urlopen(_PAYLOAD_DICT)
+    
+    with patch.object(check_esi_update, 'get_latest_date') as mock_latest:
+        assert not check_esi_update.check_once(_check_args(), [_WEBHOOK], "TestAgent/1.0")
+    
+    mock_latest.assert_not_called()
+    assert not _discord_posts(requests)
+
+
+def test_check_once_older_entry_updates_digest_only(fake_urlopen, state_dir, check_esi_update):
+    """Test a new entry older than the known date rewrites the digest without posting."""
+    dates = {"compatibility_dates": ["2024-01-01", "2024-05-01", "2024-06-15"]}
+    (state_dir / "last_esi_date.txt").write_text("2024-06-15")
+    (state_dir / "last_esi_digest.txt").write_text(
+        check_esi_update.compute_dates_digest(_DATES_DICT)
+    )
+    requests = fake_urlopen(json.dumps(dates).encode())
+    
+    assert not check_esi_update.check_once(_check_args(), [_WEBHOOK], "TestAgent/1.0")
+    
+    assert not _discord_posts(requests)
+    assert (state_dir / "last_esi_date.txt").read_text() == "2024-06-15"
+    assert (state_dir / "last_esi_digest.txt").read_text() == \
+        check_esi_update.compute_dates_digest(dates)
+
+
+def test_check_once_same_digest_without_date_posts(fake_urlopen, state_dir, check_esi_update):
+    """Test a matching digest does not suppress the post when no date is stored."""
+    (state_dir / "last_esi_digest.txt").write_text(
+        check_esi_update.compute_dates_digest(_DATES_DICT)
+    )
+    requests = fake_urlopen(_PAYLOAD_DICT, routes={_WEBHOOK: _FakeResp(status=204)})
+    
+    assert check_esi_update.check_once(_check_args(), [_WEBHOOK], "TestAgent/1.0")
+    
+    assert len(_discord_posts(requests)) == 1
+    assert (state_dir / "last_esi_date.txt").read_text() == "2024-06-15"
+
+
+@patch('check_esi_update.random.uniform', return_value=0)
+@patch('check_esi_update.time.sleep')
+@patch('check_esi_update.check_once')
+def test_watch_backs_off_until_change(mock_check, mock_sleep, mock_uniform, check_esi_update):
+    """Test the watch interval doubles on no change and resets on change."""
+    mock_check.side_effect = [False, False, SystemExit(1), True, False]
+    mock_sleep.side_effect = [None] * 4 + [KeyboardInterrupt]
+    args = SimpleNamespace(
+        force_post=True, cache_ttl=300, min_interval=60, max_interval=200
+    )
+    
+    # Ctrl-C ends the loop cleanly
+    check_esi_update.watch(args, ["https://discord.com/api/webhooks/test"], "TestAgent/1.0")
+    
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    assert delays == [120, 200, 200, 60, 120]
+    assert not args.force_post
+    assert args.cache_ttl == 0
+
+
+@patch('check_esi_update.random.uniform', return_value=0)
+@patch('check_esi_update.time.sleep')
+@patch('check_esi_update.check_once')
+def test_watch_survives_unexpected_errors(mock_check, mock_sleep, mock_uniform, check_esi_update):
+    """Test an exception escaping check_once counts as an unchanged check."""
+    mock_check.side_effect = [TimeoutError("read timed out"), True]
+    mock_sleep.side_effect = [None, KeyboardInterrupt]
+    args = SimpleNamespace(
+        force_post=False, cache_ttl=300, min_interval=60, max_interval=200
+    )
+    
+    check_esi_update.watch(args, ["https://discord.com/api/webhooks/test"], "TestAgent/1.0")
+    
+    assert mock_check.call_count == 2
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    assert delays == [120, 60]